@@ -0,0 +1,178 @@
+import base64
+import gzip
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+
+# Sections of the structured audit that are delivered page by page
+PAGINATED_SECTIONS = {
+    "issues": ("issues",),
+    "vendor_summary": ("vendor_summary",),
+    "duplicate_amounts": ("invoice_patterns", "duplicate_amounts"),
+}
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 512
+
+
+class AuditResultCache:
+    """Thread-safe LRU of structured audit outputs keyed by audit id."""
+
+    def __init__(self, max_entries: int = 100):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def put(self, audit_output: Dict[str, Any]) -> str:
+        audit_id = uuid.uuid4().hex
+        with self.lock:
+            self.entries[audit_id] = audit_output
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return audit_id
+
+    def get(self, audit_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            audit_output = self.entries.get(audit_id)
+            if audit_output is not None:
+                self.entries.move_to_end(audit_id)
+            return audit_output
+
+
+def encode_cursor(section: str, offset: int) -> str:
+    raw = json.dumps({"s": section, "o": offset}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, section: str) -> int:
+    """Returns the offset stored in a cursor. Raises ValueError if it is malformed or for another section."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        offset = int(data["o"])
+    except Exception:
+        raise ValueError("Malformed cursor.")
+    if data.get("s") != section or offset < 0:
+        raise ValueError(f"Cursor does not belong to section '{section}'.")
+    return offset
+
+
+def section_items(audit_output: Dict[str, Any], section: str) -> List[Any]:
+    value: Any = audit_output
+    for key in PAGINATED_SECTIONS[section]:
+        value = value.get(key, {}) if isinstance(value, dict) else {}
+    return value if isinstance(value, list) else []
+
+
+def paginate(items: List[Any], section: str, cursor: Optional[str], limit: int) -> Dict[str, Any]:
+    """
+    Slices one page out of a section list.
+
+    Args:
+        items (list): The full section list.
+        section (str): Section name, bound into the cursor.
+        cursor (Optional[str]): Cursor from a previous page, or None for the first page.
+        limit (int): Maximum number of items per page.
+
+    Returns:
+        dict: The page items, the cursor for the next page (None at the end) and the total count.
+    """
+    offset = decode_cursor(cursor, section) if cursor else 0
+    end = offset + limit
+    return {
+        "items": items[offset:end],
+        "next_cursor": encode_cursor(section, end) if end < len(items) else None,
+        "total": len(items),
+    }
+
+
+def audit_overview(audit_output: Dict[str, Any], limit: int) -> Dict[str, Any]:
+    """Returns the structured audit with the paginated sections replaced by their first page."""
+    overview = {
+        "summary": audit_output.get("summary", {}),
+        "compliance_flags": audit_output.get("compliance_flags", {}),
+        "repeated_items": audit_output.get("invoice_patterns", {}).get("repeated_items", []),
+        "fuzzy_insights": audit_output.get("fuzzy_insights", []),
+    }
+    if "fuzzy_insights_error" in audit_output:
+        overview["fuzzy_insights_error"] = audit_output["fuzzy_insights_error"]
+    for section in PAGINATED_SECTIONS:
+        overview[section] = paginate(section_items(audit_output, section), section, None, limit)
+    return overview
+
+
+def _quality(params: str) -> float:
+    """Returns the q value from an Accept-Encoding entry's parameters (1.0 if absent, 0.0 if malformed)."""
+    for param in params.split(";"):
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "q":
+            try:
+                return float(value.strip())
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def _accepted_quality(request: Request, encoding: str) -> float:
+    """
+    The q value the client's Accept-Encoding gives ``encoding``. An explicit
+    entry takes precedence over ``*``; an unlisted coding gets 0.
+    """
+    wildcard = 0.0
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if name == encoding:
+            return _quality(params)
+        if name == "*":
+            wildcard = _quality(params)
+    return wildcard
+
+
+def _choose_encoding(request: Request) -> Optional[str]:
+    """Picks the supported coding with the highest q > 0, preferring brotli on ties; None for identity."""
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = _accepted_quality(request, encoding)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def json_delivery_response(request: Request, payload: Any) -> Response:
+    """
+    Serializes ``payload`` as JSON with an ETag, answering conditional requests
+    with 304 and compressing the body with whichever of brotli or gzip the
+    client's Accept-Encoding ranks highest.
+    """
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    # Weak ETag: the gzip, brotli and identity bodies are equivalent representations
+    opaque_tag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    headers = {"ETag": f"W/{opaque_tag}", "Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "").strip()
+    client_tags = [tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip() for tag in if_none_match.split(",")]
+    if if_none_match == "*" or opaque_tag in client_tags:
+        return Response(status_code=304, headers=headers)
+
+    encoding = _choose_encoding(request) if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding == "br":
+        body = brotli.compress(body, quality=5)
+        headers["Content-Encoding"] = "br"
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+
+    return Response(content=body, media_type="application/json", headers=headers)
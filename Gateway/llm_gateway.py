@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+
+# HTTP statuses worth retrying; anything else in the 4xx range is a caller error.
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+# Client exceptions (groq/openai SDKs, httpx) raised for connection failures and timeouts.
+# Matched by name so the gateway does not depend on a particular SDK.
+TRANSIENT_ERROR_NAMES = {
+    "APIConnectionError", "APITimeoutError",
+    "ConnectError", "ConnectTimeout", "ReadTimeout", "WriteTimeout", "PoolTimeout",
+    "TimeoutException", "RemoteProtocolError",
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at ``rate_per_minute``.
+
+    ``acquire`` blocks until the requested amount is available. Requests larger
+    than the bucket capacity are clamped so they can never wait forever.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Blocks until ``amount`` tokens are taken. Returns the seconds spent waiting."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate_per_second
+            time.sleep(delay)
+            waited += delay
+
+
+def estimate_tokens(messages: List[Any]) -> int:
+    """Rough prompt size estimate (~4 characters per token) used for TPM budgeting."""
+    chars = sum(len(str(getattr(m, "content", m))) for m in messages)
+    return max(1, chars // 4)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _is_retryable(error: Exception) -> bool:
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    """
+    Shared entry point for chat model calls.
+
+    Wraps any model exposing ``invoke(messages)`` (e.g. ``ChatGroq``) with:
+    - token buckets for requests and tokens per minute,
+    - a bounded concurrency pool,
+    - retries with exponential backoff and full jitter,
+    - coalescing of identical in-flight prompts into a single upstream call.
+    """
+
+    def __init__(
+        self,
+        chat_model,
+        requests_per_minute: float = 30,
+        tokens_per_minute: float = 6000,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 20.0,
+    ):
+        self.chat_model = chat_model
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.pool = threading.BoundedSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.lock = threading.Lock()
+        self.in_flight_prompts: Dict[str, Future] = {}
+        self.stats = {
+            "queue_depth": 0,
+            "active_requests": 0,
+            "requests": 0,
+            "upstream_calls": 0,
+            "coalesced": 0,
+            "retries": 0,
+            "failures": 0,
+            "rate_limit_wait_seconds": 0.0,
+        }
+
+    def _prompt_key(self, messages: List[Any]) -> str:
+        payload = json.dumps(
+            [(type(m).__name__, str(getattr(m, "content", m))) for m in messages],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _bump(self, key: str, amount=1) -> None:
+        with self.lock:
+            self.stats[key] += amount
+
+    def _call_with_retries(self, messages: List[Any]):
+        attempt = 0
+        while True:
+            self._bump("queue_depth")
+            try:
+                waited = self.request_bucket.acquire(1)
+                waited += self.token_bucket.acquire(estimate_tokens(messages))
+                self.pool.acquire()
+            finally:
+                self._bump("queue_depth", -1)
+            self._bump("rate_limit_wait_seconds", waited)
+
+            self._bump("active_requests")
+            try:
+                self._bump("upstream_calls")
+                return self.chat_model.invoke(messages)
+            except Exception as e:
+                if not _is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                elif delay > self.max_delay:
+                    # e.g. a daily quota: waiting would only hold the request thread hostage
+                    raise
+                print(f"⚠️ LLM call failed ({_status_code(e) or type(e).__name__}), retrying in {delay:.2f}s")
+            finally:
+                self._bump("active_requests", -1)
+                self.pool.release()
+
+            attempt += 1
+            self._bump("retries")
+            time.sleep(delay)
+
+    def invoke(self, messages: List[Any]):
+        """
+        Sends ``messages`` to the wrapped model, sharing the result with any
+        identical prompt already in flight.
+        """
+        self._bump("requests")
+        key = self._prompt_key(messages)
+
+        with self.lock:
+            pending = self.in_flight_prompts.get(key)
+            if pending is None:
+                future: Future = Future()
+                self.in_flight_prompts[key] = future
+            else:
+                self.stats["coalesced"] += 1
+
+        if pending is not None:
+            return pending.result()
+
+        try:
+            response = self._call_with_retries(messages)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            self._bump("failures")
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.in_flight_prompts.pop(key, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns a snapshot of queue depth and call counters."""
+        with self.lock:
+            snapshot = dict(self.stats)
+            snapshot["in_flight_prompts"] = len(self.in_flight_prompts)
+        snapshot["max_concurrency"] = self.max_concurrency
+        snapshot["rate_limit_wait_seconds"] = round(snapshot["rate_limit_wait_seconds"], 3)
+        return snapshot
+
+
+_gateways: Dict[Tuple[str, float], LLMGateway] = {}
+_gateways_lock = threading.Lock()
+
+
+def get_gateway(model: str, temperature: float) -> LLMGateway:
+    """
+    Returns the process-wide gateway for a Groq model, creating it on first use.
+
+    Limits are read from the environment (GROQ_RPM, GROQ_TPM, LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES). Set GROQ_BASE_URL to point the client at a local stub server.
+    """
+    with _gateways_lock:
+        key = (model, temperature)
+        if key not in _gateways:
+            from langchain_groq import ChatGroq
+
+            load_dotenv()
+            client_kwargs = {}
+            if os.getenv("GROQ_BASE_URL"):
+                client_kwargs["base_url"] = os.getenv("GROQ_BASE_URL")
+            chat_model = ChatGroq(
+                model=model,
+                temperature=temperature,
+                api_key=os.getenv("GROQ_API_KEY"),  # type: ignore
+                max_retries=0,  # Retries are handled by the gateway
+                **client_kwargs,
+            )  # type: ignore
+            _gateways[key] = LLMGateway(
+                chat_model,
+                requests_per_minute=float(os.getenv("GROQ_RPM", "30")),
+                tokens_per_minute=float(os.getenv("GROQ_TPM", "6000")),
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+            )
+        return _gateways[key]
+
+
+def gateway_metrics() -> Dict[str, Dict[str, Any]]:
+    """Returns metrics for every gateway created in this process, keyed by model."""
+    with _gateways_lock:
+        return {f"{model}@{temperature}": gw.metrics() for (model, temperature), gw in _gateways.items()}
@@ -1,17 +1,11 @@
-from langchain_groq import ChatGroq
 from langchain.schema import SystemMessage, HumanMessage
-from dotenv import load_dotenv
+from Gateway.llm_gateway import get_gateway
 import json
-import os
 
 class LlamaAuditSummarizer:
     def __init__(self, model: str = "llama-3.1-8b-instant", temperature: float = 0.5):
-        load_dotenv()
-        self.chat_model = ChatGroq(
-            model=model,
-            temperature=temperature,
-            api_key=os.getenv("GROQ_API_KEY")  # type: ignore
-        )  # type: ignore
+        # Shared, rate-limited client; exposes the same invoke() as ChatGroq
+        self.chat_model = get_gateway(model, temperature)
 
         self.system_prompt = """
 You are a Senior Financial Auditor AI.
@@ -0,0 +1,286 @@
+import re
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+import numpy as np
+
+
+# Iglewicz-Hoaglin cut-off for the modified z-score
+ROBUST_Z_THRESHOLD = 3.5
+# Groups smaller than this have no meaningful median/MAD
+MIN_GROUP_SIZE = 4
+# Nigrini's first-digit MAD bound for "nonconformity"
+BENFORD_MAD_THRESHOLD = 0.015
+BENFORD_MIN_SAMPLES = 50
+BENFORD_EXPECTED = np.log10(1 + 1 / np.arange(1, 10))
+# Amounts divisible by this are treated as round numbers
+ROUND_AMOUNT_UNIT = 100
+# Per-type cap so a large batch does not flood the summarizer
+MAX_INSIGHTS_PER_TYPE = 10
+# The only insight type the LLM may add on top of the engine's findings
+LLM_ONLY_INSIGHT_TYPES = {"unusual_item_mix"}
+# Quoted item/vendor names, and tokens containing a digit (invoice ids, amounts, scores)
+QUOTED_NAME_PATTERN = re.compile(r"'([^']+)'")
+NUMERIC_TOKEN_PATTERN = re.compile(r"[\w\-/.,]*\d[\w\-/.,]*")
+
+
+def robust_z_scores(values: np.ndarray) -> np.ndarray:
+    """
+    Modified z-scores, 0.6745 * (x - median) / MAD.
+
+    Falls back to the mean absolute deviation when more than half the values
+    are identical (MAD of zero); returns zeros if the values do not vary at all.
+    """
+    median = np.median(values)
+    deviations = np.abs(values - median)
+    mad = np.median(deviations)
+    if mad > 0:
+        return 0.6745 * (values - median) / mad
+    mean_ad = deviations.mean()
+    if mean_ad > 0:
+        return (values - median) / (1.253314 * mean_ad)
+    return np.zeros_like(values)
+
+
+def _split_groups(inverse: np.ndarray, rows: np.ndarray) -> List[np.ndarray]:
+    """Splits ``rows`` into one array per group id in ``inverse`` with a single sort (O(N log N))."""
+    if len(rows) == 0:
+        return []
+    ordered = rows[np.argsort(inverse[rows], kind="stable")]
+    boundaries = np.flatnonzero(np.diff(inverse[ordered])) + 1
+    return np.split(ordered, boundaries)
+
+
+def _group_outliers(keys: np.ndarray, values: np.ndarray):
+    """
+    Computes robust z-scores within each key group.
+
+    Returns:
+        tuple: Per-row z-scores and per-row group medians (both NaN where the row was not scored).
+    """
+    scores = np.full(len(values), np.nan)
+    medians = np.full(len(values), np.nan)
+    if len(values) == 0:
+        return scores, medians
+    _, inverse = np.unique(keys, return_inverse=True)
+    valid = np.flatnonzero(~np.isnan(values))
+    # Only groups large enough to score are split out
+    sizes = np.bincount(inverse[valid], minlength=inverse.max() + 1)
+    scored = valid[sizes[inverse[valid]] >= MIN_GROUP_SIZE]
+    for rows in _split_groups(inverse, scored):
+        scores[rows] = robust_z_scores(values[rows])
+        medians[rows] = np.median(values[rows])
+    return scores, medians
+
+
+def _outlier_rows(scores: np.ndarray) -> np.ndarray:
+    """Rows whose |z| exceeds the threshold, most extreme first."""
+    magnitude = np.abs(np.nan_to_num(scores))
+    rows = np.flatnonzero(magnitude > ROBUST_Z_THRESHOLD)
+    return rows[np.argsort(-magnitude[rows], kind="stable")]
+
+
+def _first_digits(amounts: np.ndarray) -> np.ndarray:
+    positive = amounts[amounts > 0]
+    exponents = np.floor(np.log10(positive))
+    return np.floor(positive / 10 ** exponents).astype(np.int64)
+
+
+def _capped(rows, insight_type: str, describe) -> List[Dict[str, str]]:
+    """Describes at most MAX_INSIGHTS_PER_TYPE findings and summarises the rest in one entry."""
+    insights = [{"type": insight_type, "description": describe(row)} for row in rows[:MAX_INSIGHTS_PER_TYPE]]
+    extra = len(rows) - MAX_INSIGHTS_PER_TYPE
+    if extra > 0:
+        insights.append({
+            "type": insight_type,
+            "description": f"{extra} more {insight_type.replace('_', ' ')} finding(s) omitted.",
+        })
+    return insights
+
+
+class AnomalyEngine:
+    """
+    Deterministic anomaly signals over invoice line items.
+
+    Each line item is one record with ``invoice_id``, ``vendor``, ``item``,
+    ``quantity`` and ``amount`` (floats, or None when unparseable). Findings
+    are returned in the ``fuzzy_insights`` schema: ``{"type", "description"}``.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = records
+        self.invoice_ids = np.array([str(r["invoice_id"]) for r in records], dtype=object)
+        self.vendors = np.array([r["vendor"] or "" for r in records], dtype=object)
+        self.items = np.array([str(r["item"]) for r in records], dtype=object)
+        self.quantities = self._to_array([r["quantity"] for r in records])
+        self.amounts = self._to_array([r["amount"] for r in records])
+
+    @staticmethod
+    def _to_array(values: List[Optional[float]]) -> np.ndarray:
+        return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+    def suspicious_quantities(self) -> List[Dict[str, str]]:
+        scores, medians = _group_outliers(self.items, self.quantities)
+        return _capped(_outlier_rows(scores), "suspicious_quantity", lambda i: (
+            f"Invoice {self.invoice_ids[i]} bills {self.quantities[i]:g} × '{self.items[i]}', "
+            f"against a typical {medians[i]:g} (robust z-score {scores[i]:.1f})."
+        ))
+
+    def _invoice_totals(self):
+        """Totals per invoice, keyed by (vendor, invoice_id) so vendors sharing an id stay separate."""
+        keys = np.array([f"{v}\x00{i}" for v, i in zip(self.vendors, self.invoice_ids)], dtype=object)
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        totals = np.bincount(inverse, weights=np.nan_to_num(self.amounts), minlength=len(first))
+        return self.invoice_ids[first], self.vendors[first], totals
+
+    def unusual_invoice_amounts(self) -> List[Dict[str, str]]:
+        invoices, vendors, totals = self._invoice_totals()
+        scores, medians = _group_outliers(vendors, totals)
+        return _capped(_outlier_rows(scores), "unusual_invoice_amount", lambda i: (
+            f"Invoice {invoices[i]} from '{vendors[i]}' totals ₹{totals[i]:,.2f}, "
+            f"far from the vendor's median of ₹{medians[i]:,.2f} (robust z-score {scores[i]:.1f})."
+        ))
+
+    def single_invoice_vendors(self) -> List[Dict[str, str]]:
+        _, vendors, _ = self._invoice_totals()
+        names, counts = np.unique(vendors[vendors != ""], return_counts=True)
+        # One vendor on one invoice is just a small batch, not a signal
+        if len(names) < 2:
+            return []
+        return _capped(names[counts == 1], "single_invoice_vendor", lambda name: (
+            f"Vendor '{name}' has only one invoice in this batch, which may warrant further review."
+        ))
+
+    def zero_value_items(self) -> List[Dict[str, str]]:
+        zero_qty = self.quantities == 0
+        zero_amt = self.amounts <= 0
+
+        def describe(i):
+            if zero_qty[i] and zero_amt[i]:
+                detail = "a quantity and billed amount of zero"
+            elif zero_qty[i]:
+                detail = f"a quantity of zero but a billed amount of ₹{self.amounts[i]:,.2f}"
+            elif self.amounts[i] < 0:
+                detail = f"a negative billed amount of ₹{self.amounts[i]:,.2f}"
+            else:
+                detail = f"a quantity of {self.quantities[i]:g} but a billed amount of zero"
+            return f"Line item '{self.items[i]}' on invoice {self.invoice_ids[i]} has {detail}."
+
+        return _capped(np.flatnonzero(zero_qty | zero_amt), "zero_value_item", describe)
+
+    def repeated_non_round_amounts(self) -> List[Dict[str, str]]:
+        amounts = np.round(np.nan_to_num(self.amounts), 2)
+        non_round = np.abs(np.remainder(amounts, ROUND_AMOUNT_UNIT)) > 1e-9
+        rows = np.flatnonzero((amounts > 0) & non_round)
+        values, inverse = np.unique(amounts[rows], return_inverse=True)
+        full_inverse = np.zeros(len(amounts), dtype=np.int64)
+        full_inverse[rows] = inverse
+
+        repeated = []
+        for group in _split_groups(full_inverse, rows):
+            invoices = {(self.vendors[i], self.invoice_ids[i]) for i in group}
+            if len(invoices) >= 2:
+                ids = sorted(i for _, i in invoices)
+                if len(set(ids)) < len(ids):
+                    # The same id is used by several vendors; name the vendor to tell them apart
+                    ids = sorted(f"{i} ({v})" for v, i in invoices)
+                repeated.append((values[full_inverse[group[0]]], len(group), ids))
+
+        def describe(entry):
+            value, count, ids = entry
+            listed = ", ".join(ids[:5]) + (f" and {len(ids) - 5} more" if len(ids) > 5 else "")
+            return (
+                f"The non-round amount ₹{value:,.2f} appears {count} times across invoices "
+                f"{listed}, which may indicate automated billing or duplication."
+            )
+
+        return _capped(repeated, "repeated_non_round_amount", describe)
+
+    def benford_deviation(self) -> List[Dict[str, str]]:
+        digits = _first_digits(self.amounts[~np.isnan(self.amounts)])
+        if len(digits) < BENFORD_MIN_SAMPLES:
+            return []
+        observed = np.bincount(digits, minlength=10)[1:10] / len(digits)
+        mad = np.abs(observed - BENFORD_EXPECTED).mean()
+        if mad <= BENFORD_MAD_THRESHOLD:
+            return []
+        chi_square = len(digits) * ((observed - BENFORD_EXPECTED) ** 2 / BENFORD_EXPECTED).sum()
+        digit = int(np.argmax(observed - BENFORD_EXPECTED)) + 1
+        return [{
+            "type": "benford_deviation",
+            "description": (
+                f"Leading digits of {len(digits)} line amounts deviate from Benford's law "
+                f"(MAD {mad:.4f}, chi-square {chi_square:.1f}); digit {digit} appears in "
+                f"{observed[digit - 1]:.1%} of amounts versus an expected {BENFORD_EXPECTED[digit - 1]:.1%}."
+            ),
+        }]
+
+    def detect(self) -> List[Dict[str, str]]:
+        if not self.records:
+            return []
+        return (
+            self.suspicious_quantities()
+            + self.unusual_invoice_amounts()
+            + self.single_invoice_vendors()
+            + self.zero_value_items()
+            + self.repeated_non_round_amounts()
+            + self.benford_deviation()
+        )
+
+
+def _is_insight(value: Any) -> bool:
+    return (
+        isinstance(value, dict)
+        and isinstance(value.get("type"), str)
+        and isinstance(value.get("description"), str)
+        and value["description"].strip() != ""
+    )
+
+
+def _facts(description: str) -> Tuple[Set[str], Set[str]]:
+    """Returns the quoted names and digit-bearing tokens (commas dropped) of a description."""
+    names = {name.lower() for name in QUOTED_NAME_PATTERN.findall(description)}
+    tokens = {token.strip(".,").replace(",", "") for token in NUMERIC_TOKEN_PATTERN.findall(description)}
+    return names, tokens
+
+
+def _keeps_facts(original: str, reworded: str) -> bool:
+    """Whether every name, identifier and number in ``original`` also appears in ``reworded``."""
+    names, tokens = _facts(original)
+    _, reworded_tokens = _facts(reworded)
+    text = reworded.lower()
+    return all(name in text for name in names) and tokens <= reworded_tokens
+
+
+def merge_phrased_insights(engine_insights: List[Dict[str, str]], phrased: Any):
+    """
+    Combines the engine's findings with an LLM rewording of them.
+
+    The model's descriptions are considered only if, after setting aside its
+    ``unusual_item_mix`` entries, it returned exactly the engine's insight types
+    in the same order. Even then, a reworded description is used only if it
+    keeps every quoted name, invoice id and number of the engine's description;
+    otherwise that insight keeps the engine's text. Well-formed
+    ``unusual_item_mix`` entries are appended either way.
+
+    Returns:
+        tuple: The merged insights and whether every model description was used.
+    """
+    phrased = [i for i in phrased if _is_insight(i)] if isinstance(phrased, list) else []
+    extra = [
+        {"type": i["type"], "description": i["description"]}
+        for i in phrased if i["type"] in LLM_ONLY_INSIGHT_TYPES
+    ]
+    rewritten = [i for i in phrased if i["type"] not in LLM_ONLY_INSIGHT_TYPES]
+
+    if [i["type"] for i in rewritten] != [i["type"] for i in engine_insights]:
+        return [dict(i) for i in engine_insights] + extra, False
+
+    merged = []
+    aligned = True
+    for engine, reworded in zip(engine_insights, rewritten):
+        if _keeps_facts(engine["description"], reworded["description"]):
+            merged.append({"type": engine["type"], "description": reworded["description"]})
+        else:
+            merged.append(dict(engine))
+            aligned = False
+    return merged + extra, aligned
@@ -1,12 +1,25 @@
 import re
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from Mistral.tax_id_validator import find_invalid_gstins, find_invalid_pans
+from Mistral.anomaly_engine import AnomalyEngine
 
 
 class MistralAuditLogic:
     def __init__(self, invoices: List[Dict[str, Any]]):
         self.invoices = invoices
 
+    @classmethod
+    def from_store(
+        cls,
+        store,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        vendors: Optional[List[str]] = None,
+    ) -> "MistralAuditLogic":
+        """Builds an audit over invoices held in an InvoiceStore for a date/vendor range."""
+        return cls(store.load_invoices(start_date, end_date, vendors))
+
     def clean_amount(self,amount):
         try:
             # If it's already a number, return as float
@@ -49,6 +62,10 @@ class MistralAuditLogic:
         for inv in self.invoices:
             if not inv.get("vendor"):
                 missing.append({"invoice_id": inv["invoice_id"], "field": "vendor"})
+            # Tax ids are only required when the source document has the field
+            for field in ["gstin", "pan"]:
+                if field in inv and not inv[field]:
+                    missing.append({"invoice_id": inv["invoice_id"], "field": field})
             for product in inv["products"]:
                 for field in ["quantity", "unit_price", "total"]:
                     if not product.get(field):
@@ -69,6 +86,12 @@ class MistralAuditLogic:
                 continue
         return future_flags
 
+    def detect_invalid_tax_ids(self) -> Dict[str, List[Dict[str, str]]]:
+        return {
+            "invalid_gstin": find_invalid_gstins(self.invoices),
+            "invalid_pan": find_invalid_pans(self.invoices),
+        }
+
     def summarize_vendors(self) -> List[Dict[str, Any]]:
         summary = {}
         for inv in self.invoices:
@@ -106,6 +129,23 @@ class MistralAuditLogic:
         ]
         return {"duplicate_amounts": duplicate_amounts, "repeated_items": repeated_items}
 
+    def detect_anomalies(self) -> List[Dict[str, str]]:
+        records = []
+        for inv in self.invoices:
+            for product in inv["products"]:
+                try:
+                    quantity = float(product["quantity"])
+                except (TypeError, ValueError):
+                    quantity = None
+                records.append({
+                    "invoice_id": inv["invoice_id"],
+                    "vendor": inv["vendor"],
+                    "item": product["name"],
+                    "quantity": quantity,
+                    "amount": self.clean_amount(product["total"]),
+                })
+        return AnomalyEngine(records).detect()
+
     def run_audit(self) -> Dict[str, Any]:
         return {
             "summary": {
@@ -120,10 +160,11 @@ class MistralAuditLogic:
             "compliance_flags": {
                 "missing_fields": self.detect_missing_fields(),
                 "future_dates": self.detect_future_dates(),
-                "invalid_gstin": []  # Optional: if GSTIN was part of input
+                **self.detect_invalid_tax_ids(),
             },
             "vendor_summary": self.summarize_vendors(),
-            "invoice_patterns": self.detect_duplicates_and_repeats()
+            "invoice_patterns": self.detect_duplicates_and_repeats(),
+            "fuzzy_insights": self.detect_anomalies()
         }
 
 
@@ -137,7 +178,8 @@ if __name__ == "__main__":
                 {"name": "Cement Bags", "quantity": "10", "total": "Rs. 5000.00", "unit_price": "Rs. 500.00"},
                 {"name": "Steel Rods", "quantity": "5", "total": "Rs. 6000.00", "unit_price": "Rs. 1200.00"}
             ],
-            "vendor": "ABC Traders"
+            "vendor": "ABC Traders",
+            "gstin": "27AAPFU0939F1ZV"
         },
         {
             "date": "2025-08-12",
@@ -146,7 +188,8 @@ if __name__ == "__main__":
                 {"name": "Bricks", "quantity": "1000", "total": "Rs. 10000.00", "unit_price": "Rs. 10.00"},
                 {"name": "Sand Bags", "quantity": "50", "total": "Rs. 4000.00", "unit_price": "Rs. 80.00"}
             ],
-            "vendor": "XYZ Construction Supplies"
+            "vendor": "XYZ Construction Supplies",
+            "gstin": "123INVALIDGST"
         },
         {
             "date": "2025-06-20",
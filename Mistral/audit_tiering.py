@@ -0,0 +1,192 @@
+import os
+import threading
+from typing import Dict, Any, List, Tuple
+
+
+FAST_PATH_TIER = "fast_path"
+LLM_TIER = "llm"
+
+# Insight types that do not by themselves need LLM reasoning; the templated
+# report already covers single-invoice vendors in its vendor risk line.
+ROUTINE_INSIGHT_TYPES = {"single_invoice_vendor"}
+
+
+def risk_counts(audit_json: Dict[str, Any]) -> Dict[str, int]:
+    """Counts the risk signals in a rule-based audit JSON that tiering thresholds apply to."""
+    flags = audit_json.get("compliance_flags", {})
+    patterns = audit_json.get("invoice_patterns", {})
+    return {
+        "issues": len(audit_json.get("issues", [])),
+        "missing_fields": len(flags.get("missing_fields", [])),
+        "future_dates": len(flags.get("future_dates", [])),
+        "invalid_gstin": len(flags.get("invalid_gstin", [])),
+        "invalid_pan": len(flags.get("invalid_pan", [])),
+        "duplicate_amounts": len(patterns.get("duplicate_amounts", [])),
+        "anomalies": len([
+            i for i in audit_json.get("fuzzy_insights", []) if i.get("type") not in ROUTINE_INSIGHT_TYPES
+        ]),
+    }
+
+
+class AuditTierPolicy:
+    """
+    Decides whether an audit needs the LLM agents or can be reported from a template.
+
+    A batch stays on the fast path while every risk count in the rule-based
+    audit JSON is at or below its threshold. Thresholds default to zero, i.e.
+    only completely clean batches skip the LLMs.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_issues: int = 0,
+        max_missing_fields: int = 0,
+        max_future_dates: int = 0,
+        max_invalid_gstin: int = 0,
+        max_invalid_pan: int = 0,
+        max_duplicate_amounts: int = 0,
+        max_anomalies: int = 0,
+    ):
+        self.enabled = enabled
+        self.thresholds = {
+            "issues": max_issues,
+            "missing_fields": max_missing_fields,
+            "future_dates": max_future_dates,
+            "invalid_gstin": max_invalid_gstin,
+            "invalid_pan": max_invalid_pan,
+            "duplicate_amounts": max_duplicate_amounts,
+            "anomalies": max_anomalies,
+        }
+        self.lock = threading.Lock()
+        self.tier_counts = {FAST_PATH_TIER: 0, LLM_TIER: 0}
+
+    @classmethod
+    def from_env(cls) -> "AuditTierPolicy":
+        """Reads AUDIT_TIERING (on/off) and AUDIT_FAST_PATH_MAX_* thresholds from the environment."""
+        return cls(
+            enabled=os.getenv("AUDIT_TIERING", "on").lower() not in ("0", "off", "false", "no"),
+            max_issues=int(os.getenv("AUDIT_FAST_PATH_MAX_ISSUES", "0")),
+            max_missing_fields=int(os.getenv("AUDIT_FAST_PATH_MAX_MISSING_FIELDS", "0")),
+            max_future_dates=int(os.getenv("AUDIT_FAST_PATH_MAX_FUTURE_DATES", "0")),
+            max_invalid_gstin=int(os.getenv("AUDIT_FAST_PATH_MAX_INVALID_GSTIN", "0")),
+            max_invalid_pan=int(os.getenv("AUDIT_FAST_PATH_MAX_INVALID_PAN", "0")),
+            max_duplicate_amounts=int(os.getenv("AUDIT_FAST_PATH_MAX_DUPLICATE_AMOUNTS", "0")),
+            max_anomalies=int(os.getenv("AUDIT_FAST_PATH_MAX_ANOMALIES", "0")),
+        )
+
+    def select_tier(self, audit_json: Dict[str, Any]) -> Tuple[str, List[str]]:
+        """
+        Picks the tier for an audit and records it in the tier counters.
+
+        Returns:
+            tuple: The tier name and the list of thresholds that were crossed.
+        """
+        counts = risk_counts(audit_json)
+        crossed = [name for name, count in counts.items() if count > self.thresholds[name]]
+        tier = FAST_PATH_TIER if self.enabled and not crossed else LLM_TIER
+        with self.lock:
+            self.tier_counts[tier] += 1
+        return tier, crossed
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns how often each tier has been used, with its share of all audits."""
+        with self.lock:
+            counts = dict(self.tier_counts)
+        total = sum(counts.values())
+        return {
+            "enabled": self.enabled,
+            "thresholds": dict(self.thresholds),
+            "total": total,
+            "tiers": {
+                tier: {"count": count, "share": round(count / total, 4) if total else 0.0}
+                for tier, count in counts.items()
+            },
+        }
+
+
+def _format_inr(amount: float) -> str:
+    return f"₹{amount:,.2f}"
+
+
+def render_template_report(audit_json: Dict[str, Any]) -> str:
+    """
+    Renders the Legal / Manager / Accountant markdown report for a low-risk
+    audit directly from the rule-based audit JSON, in the same layout the
+    LLaMA summarizer produces.
+    """
+    summary = audit_json.get("summary", {})
+    date_range = summary.get("date_range", {})
+    flags = audit_json.get("compliance_flags", {})
+    patterns = audit_json.get("invoice_patterns", {})
+    vendors = sorted(audit_json.get("vendor_summary", []), key=lambda v: v["total_billed"], reverse=True)
+    total_billed = sum(v["total_billed"] for v in vendors)
+    counts = risk_counts(audit_json)
+
+    lines = ["## Legal Summary"]
+    lines.append(
+        f"- **Compliance & Legal Fields:** {counts['missing_fields']} missing field(s), "
+        f"{counts['invalid_gstin']} invalid GSTIN(s), {counts['invalid_pan']} invalid PAN(s) and {counts['future_dates']} future-dated invoice(s) "
+        f"across {summary.get('total_invoices', 0)} invoices dated {date_range.get('start')} to {date_range.get('end')}."
+    )
+    for flag in flags.get("missing_fields", []):
+        lines.append(f"- **Missing Field:** `{flag['field']}` on {flag['invoice_id']}.")
+    for flag in flags.get("invalid_gstin", []):
+        lines.append(f"- **Invalid GSTIN:** {flag['gstin']} on {flag['invoice_id']} ({flag['reason']}).")
+    for flag in flags.get("invalid_pan", []):
+        lines.append(f"- **Invalid PAN:** {flag['pan']} on {flag['invoice_id']} ({flag['reason']}).")
+    for flag in flags.get("future_dates", []):
+        lines.append(f"- **Future Date:** {flag['invoice_id']} is dated {flag['date']}.")
+    single_invoice_vendors = [v["vendor"] for v in vendors if v["invoice_count"] == 1]
+    if single_invoice_vendors:
+        lines.append(
+            f"- **Vendor & Transaction Risk:** {len(single_invoice_vendors)} vendor(s) appear on a single invoice: "
+            f"{', '.join(single_invoice_vendors[:5])}{' and others' if len(single_invoice_vendors) > 5 else ''}."
+        )
+    else:
+        lines.append("- **Vendor & Transaction Risk:** Every vendor in this batch has more than one invoice.")
+    if counts["missing_fields"] or counts["invalid_gstin"] or counts["invalid_pan"] or counts["future_dates"]:
+        lines.append("- **Recommendations:** Request corrected invoices for the items flagged above.")
+    else:
+        lines.append("- **Recommendations:** No compliance action required; continue routine GSTIN and date checks.")
+
+    lines.append("")
+    lines.append("## Manager Summary")
+    lines.append(f"- **Vendor Management:** {summary.get('vendors', 0)} vendors billed a total of {_format_inr(total_billed)}.")
+    if vendors and total_billed:
+        top = vendors[0]
+        lines.append(
+            f"- **Spend Analysis:** Largest vendor is {top['vendor']} with {_format_inr(top['total_billed'])} "
+            f"({top['total_billed'] / total_billed:.0%} of spend) over {top['invoice_count']} invoice(s)."
+        )
+    repeated_items = patterns.get("repeated_items", [])
+    if repeated_items:
+        items = ", ".join(f"{r['item']} ({r['occurrences']}x)" for r in repeated_items[:5])
+        lines.append(f"- **Spend Analysis:** Frequently purchased items: {items}.")
+    insights = [i for i in audit_json.get("fuzzy_insights", []) if i["type"] != "single_invoice_vendor"]
+    for insight in insights:
+        lines.append(f"- **{insight['type'].replace('_', ' ').title()}:** {insight['description']}")
+    if insights:
+        lines.append("- **Recommendations:** Review the flagged patterns above with the relevant vendors.")
+    else:
+        lines.append("- **Recommendations:** No managerial action required for this batch.")
+
+    lines.append("")
+    lines.append("## Accountant Summary")
+    if counts["issues"]:
+        for issue in audit_json.get("issues", []):
+            lines.append(f"- **Data Integrity:** {issue['invoice_id']}: {issue['description']}.")
+    else:
+        lines.append("- **Data Integrity:** All line item totals match `quantity × unit_price`.")
+    if counts["duplicate_amounts"]:
+        for dup in patterns.get("duplicate_amounts", []):
+            lines.append(
+                f"- **Record Clarity:** Amount {_format_inr(dup['amount'] or 0)} appears on {', '.join(map(str, dup['invoice_ids']))}."
+            )
+    else:
+        lines.append("- **Record Clarity:** No duplicate line amounts were detected.")
+    if counts["issues"] or counts["duplicate_amounts"]:
+        lines.append("- **Recommendations:** Reconcile the line items listed above before booking.")
+    else:
+        lines.append("- **Recommendations:** Records are ready for reconciliation as submitted.")
+    return "\n".join(lines)
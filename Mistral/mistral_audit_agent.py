@@ -2,35 +2,36 @@ import json
 import json5
 import re
 from typing import List, Dict, Any
-from langchain_groq import ChatGroq
 from langchain.prompts import PromptTemplate
-from dotenv import load_dotenv
+from langchain.schema import HumanMessage
+from Gateway.llm_gateway import get_gateway
 from Mistral.audit_logic import MistralAuditLogic
+from Mistral.anomaly_engine import merge_phrased_insights
 
 
 class InvoiceAuditAgent:
     def __init__(self, model: str = "llama-3.3-70b-versatile", temperature: float = 0.2):
-        load_dotenv()
-        self.chat = ChatGroq(
-            model=model,
-            temperature=temperature,
-        )
+        self.chat = get_gateway(model, temperature)
         self.prompt_template = PromptTemplate(
             input_variables=["audit_json"],
             template=self._load_template(),
         )
-        self.chain = self.prompt_template | self.chat
 
     def _load_template(self) -> str:
         return ("""
 You are a specialized AI agent for financial data analysis. Your only function is to generate a JSON object containing analytical insights.
 
-Analyze the provided invoice audit JSON based on the following detection rules to identify potential anomalies and patterns:
-1.  **Unusual Item Mix:** Are there strange combinations of items on a single invoice (e.g., office supplies and heavy machinery)?
-2.  **Suspicious Quantities:** Are the quantities unusually high or low for the item type (e.g., 1000 laptops, 0.5 chairs)?
-3.  **Single-Invoice Vendors:** Does a vendor appear only once in the entire dataset? This can sometimes indicate a one-off, potentially risky transaction.
-4.  **Zero Value Items:** Are any line items listed with a quantity or billed amount of zero?
-5.  **Pattern Recognition:** Are there frequently repeated, non-round amounts or items that suggest automated billing or potential duplication?
+The input audit JSON already contains `"fuzzy_insights"` computed deterministically by a statistical anomaly engine:
+- **suspicious_quantity:** Quantities that are robust z-score outliers for the same item across the batch.
+- **unusual_invoice_amount:** Invoice totals that are robust z-score outliers for the same vendor.
+- **single_invoice_vendor:** Vendors that appear on only one invoice in the batch.
+- **zero_value_item:** Line items with a zero quantity or a zero/negative billed amount.
+- **repeated_non_round_amount:** Non-round amounts repeated across invoices, suggesting automated billing or duplication.
+- **benford_deviation:** Leading digits of line amounts that do not follow Benford's law.
+
+Your task:
+1.  Rewrite each pre-computed insight as a clear, professional description. Keep every insight in the same order, with its `"type"` and all invoice IDs, vendors, items and figures exactly as given. Do not invent, drop or re-score findings.
+2.  Optionally add `"unusual_item_mix"` insights for strange combinations of items on a single invoice (e.g., office supplies and heavy machinery), which the engine does not detect.
 
 ## JSON Output Requirements
 - Your entire response must be a single, valid JSON object.
@@ -45,7 +46,7 @@ Analyze the provided invoice audit JSON based on the following detection rules t
   "fuzzy_insights": [
     {{
       "type": "suspicious_quantity",
-      "description": "Invoice INV-123 contains an unusually high quantity of 500 keyboards for a small-medium enterprise."
+      "description": "Invoice INV-123 bills 500 keyboards, far above the typical 10 for this item (robust z-score 48.2)."
     }},
     {{
       "type": "single_invoice_vendor",
@@ -57,8 +58,10 @@ Analyze the provided invoice audit JSON based on the following detection rules t
     }}
   ]
 }}
+```
+
 # Input JSON:
-# {{ audit_json }}
+{audit_json}
 """)
 
     def _extract_json(self, text: str) -> Dict[str, Any]:
@@ -78,17 +81,35 @@ Analyze the provided invoice audit JSON based on the following detection rules t
     def audit(self, invoice_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         mistral_logic = MistralAuditLogic(invoice_data)
         audit_json = mistral_logic.run_audit()
+        return self.enrich(audit_json)
+
+    def enrich(self, audit_json: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Has the LLM phrase the anomaly engine's fuzzy insights in an already
+        computed audit JSON. On failure the deterministic insights are kept.
+        """
+        if not audit_json.get("fuzzy_insights"):
+            # Nothing to phrase; skip the round trip
+            return audit_json
 
         try:
             input_for_llm = json.dumps(audit_json, indent=2)
-            response = self.chain.invoke({"audit_json": input_for_llm})
+            prompt = self.prompt_template.format(audit_json=input_for_llm)
+            response = self.chat.invoke([HumanMessage(content=prompt)])
             fuzzy = self._extract_json(response.content)
-            audit_json.update({"fuzzy_insights": fuzzy.get("fuzzy_insights", [])})
+            merged, aligned = merge_phrased_insights(audit_json["fuzzy_insights"], fuzzy.get("fuzzy_insights"))
+            if not aligned:
+                # The model dropped, reordered or altered findings; its wording cannot be trusted there
+                print("⚠️ Model output did not match the engine's findings; keeping deterministic descriptions.")
+                audit_json["fuzzy_insights_error"] = "Model rewording did not match the computed insights and was discarded where it differed."
+            audit_json.update({"fuzzy_insights": merged})
 
         except Exception as e:
+            # The gateway has already retried transient failures; the engine's
+            # own descriptions stay in place and the failure is recorded.
             print(f"❌ Failed to get or parse fuzzy insights: {e}")
             audit_json.update({
-                "fuzzy_insights_error": "Failed to generate or parse insights from the model.",
+                "fuzzy_insights_error": f"Failed to phrase insights with the model: {type(e).__name__}: {e}",
             })
 
         return audit_json
@@ -0,0 +1,334 @@
+import hashlib
+import json
+import numbers
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as fs
+import pyarrow.parquet as pq
+from urllib.parse import quote
+
+
+# One row per line item; invoice-level fields are repeated on every row. An
+# invoice without line items is kept as a single row with a null line_no.
+# Quantities and amounts are stored as float64 when the parser produced a
+# number (csv_parser) and in the *_raw column when it produced a string
+# (pdf_parser, e.g. "Rs. 500.00"), so MistralAuditLogic sees the same values
+# whether it audits a batch directly or from the store.
+INVOICE_SCHEMA = pa.schema([
+    ("invoice_id", pa.string()),
+    ("vendor", pa.string()),
+    ("date", pa.string()),
+    ("gstin", pa.string()),
+    ("pan", pa.string()),
+    ("line_no", pa.int32()),
+    ("name", pa.string()),
+    ("quantity", pa.float64()),
+    ("unit_price", pa.float64()),
+    ("total", pa.float64()),
+    ("quantity_raw", pa.string()),
+    ("unit_price_raw", pa.string()),
+    ("total_raw", pa.string()),
+    ("source", pa.string()),
+])
+
+# Written alongside every row for range filters and to keep only the latest copy of an invoice
+WRITE_SCHEMA = pa.schema([
+    ("iso_date", pa.string()),     # date normalised to YYYY-MM-DD, null if unparseable
+    ("invoice_key", pa.string()),  # hash of (invoice_id, vendor, date)
+    ("seq", pa.int64()),           # write sequence number; higher wins
+    ("row_no", pa.int32()),        # position within the write, to keep upload order
+])
+
+PARTITION_SCHEMA = pa.schema([
+    ("vendor_key", pa.string()),
+    ("month", pa.string()),
+])
+
+FILE_SCHEMA = pa.schema(list(INVOICE_SCHEMA) + list(WRITE_SCHEMA))
+
+UNKNOWN_PARTITION = "unknown"
+
+LINE_ITEM_NUMBERS = ("quantity", "unit_price", "total")
+
+# Invoice date layouts recognised for partitioning and range filters
+DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d", "%d.%m.%Y", "%d %b %Y", "%d %B %Y", "%b %d, %Y")
+
+# A partition holding more files than this is compacted into one on the next append
+COMPACT_AFTER_FILES = 16
+
+
+def _to_str(value) -> Optional[str]:
+    """Stringifies a raw parser value, mapping None/NaN to null."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value != value:
+        return None
+    return str(value)
+
+
+def _split_number(value):
+    """Returns (number, raw string) for a line-item value; NaN stays a float, as pandas produced it."""
+    if value is None:
+        return None, None
+    if isinstance(value, numbers.Real):
+        return float(value), None
+    return None, str(value)
+
+
+def _iso_date(date: Optional[str]) -> Optional[str]:
+    """Normalises an invoice date to YYYY-MM-DD, or None if it matches none of DATE_FORMATS."""
+    if not date:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date.strip(), fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def _invoice_key(invoice_id: Optional[str], vendor: Optional[str], date: Optional[str]) -> str:
+    return hashlib.sha256(json.dumps([invoice_id, vendor, date]).encode("utf-8")).hexdigest()[:32]
+
+
+def _latest_writes(table: pa.Table) -> pa.Table:
+    """Keeps, for every invoice key, only the rows of its most recent write, in write order."""
+    if table.num_rows == 0:
+        return table
+    latest = table.group_by("invoice_key").aggregate([("seq", "max")])
+    latest = latest.select(["invoice_key", "seq_max"]).rename_columns(["invoice_key", "seq"])
+    table = table.join(latest, keys=["invoice_key", "seq"], join_type="left semi")
+    return table.sort_by([("seq", "ascending"), ("row_no", "ascending")])
+
+
+class InvoiceStore:
+    """
+    Local columnar store for parsed invoices.
+
+    Each append writes one Parquet file per partition it touches under a
+    hive-style layout, ``<root>/vendor_key=<vendor>/month=<YYYY-MM>/part-<seq>-*.parquet``,
+    so reads over vendor and date ranges only open the matching partitions
+    and row-group statistics prune the rest.
+
+    Rows carry the write's sequence number. An invoice, keyed by
+    (invoice_id, vendor, date), that is uploaded again is superseded rather
+    than duplicated: reads keep only its latest write, and partitions that
+    accumulate many files are compacted on append.
+    """
+
+    def __init__(self, root_dir: str = "invoice_store"):
+        self.root_dir = root_dir
+        os.makedirs(self.root_dir, exist_ok=True)
+        self.partitioning = ds.partitioning(PARTITION_SCHEMA, flavor="hive")
+        # Serializes appends, compaction and reads so no read sees a file being removed
+        self.lock = threading.Lock()
+        self.last_seq = 0
+
+    def _next_seq(self) -> int:
+        self.last_seq = max(time.time_ns(), self.last_seq + 1)
+        return self.last_seq
+
+    def _invoices_to_table(self, invoices: Iterable[Dict[str, Any]], source: str, seq: int) -> pa.Table:
+        columns: Dict[str, list] = {name: [] for name in FILE_SCHEMA.names + PARTITION_SCHEMA.names}
+        for inv in invoices:
+            invoice_id = _to_str(inv.get("invoice_id"))
+            vendor = _to_str(inv.get("vendor"))
+            date = _to_str(inv.get("date"))
+            gstin = _to_str(inv.get("gstin"))
+            pan = _to_str(inv.get("pan"))
+            iso_date = _iso_date(date)
+            invoice_key = _invoice_key(invoice_id, vendor, date)
+            products = inv.get("products") or []
+            for line_no, product in enumerate(products or [{}]):
+                columns["invoice_id"].append(invoice_id)
+                columns["vendor"].append(vendor)
+                columns["date"].append(date)
+                columns["gstin"].append(gstin)
+                columns["pan"].append(pan)
+                columns["line_no"].append(line_no if products else None)
+                columns["name"].append(_to_str(product.get("name")))
+                for field in LINE_ITEM_NUMBERS:
+                    number, raw = _split_number(product.get(field))
+                    columns[field].append(number)
+                    columns[f"{field}_raw"].append(raw)
+                columns["source"].append(source)
+                columns["iso_date"].append(iso_date)
+                columns["invoice_key"].append(invoice_key)
+                columns["seq"].append(seq)
+                columns["row_no"].append(len(columns["row_no"]))
+                columns["vendor_key"].append(vendor or UNKNOWN_PARTITION)
+                columns["month"].append(iso_date[:7] if iso_date else UNKNOWN_PARTITION)
+        schema = pa.schema(list(FILE_SCHEMA) + list(PARTITION_SCHEMA))
+        return pa.table(columns, schema=schema)
+
+    def _partition_dir(self, vendor_key: str, month: str) -> str:
+        return os.path.join(
+            self.root_dir,
+            f"vendor_key={quote(vendor_key, safe='')}",
+            f"month={quote(month, safe='')}",
+        )
+
+    def _write_file(self, table: pa.Table, directory: str, seq: int) -> None:
+        os.makedirs(directory, exist_ok=True)
+        # Dot-prefixed so dataset discovery never picks up a half-written file
+        tmp_path = os.path.join(directory, f".{uuid.uuid4().hex}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(directory, f"part-{seq:020d}-{uuid.uuid4().hex[:8]}.parquet"))
+
+    def _compact(self, directory: str) -> None:
+        """Rewrites a partition as a single file holding only the latest write of each invoice."""
+        paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".parquet")
+        )
+        if len(paths) <= COMPACT_AFTER_FILES:
+            return
+        table = _latest_writes(pa.concat_tables(pq.read_table(path, schema=FILE_SCHEMA) for path in paths))
+        self._write_file(table, directory, table["seq"][-1].as_py())
+        for path in paths:
+            os.remove(path)
+
+    def append(self, invoices: List[Dict[str, Any]], source: str = "") -> int:
+        """
+        Appends parsed invoices (as returned by csv_parser/pdf_parser) to the store.
+
+        The batch is written as one file per (vendor, month) partition. Invoices
+        already in the store under the same (invoice_id, vendor, date) are
+        superseded by this write, so uploading the same file again does not
+        duplicate its line items.
+
+        Args:
+            invoices (list): Invoice dictionaries, each with a list of products.
+            source (str): Optional label for where the invoices came from (e.g. file name).
+
+        Returns:
+            int: The number of line-item rows written.
+        """
+        with self.lock:
+            seq = self._next_seq()
+            table = self._invoices_to_table(invoices, source, seq)
+            if table.num_rows == 0:
+                return 0
+            line_items = table.num_rows - table["line_no"].null_count
+
+            rows_by_partition: Dict[tuple, List[int]] = {}
+            for row, partition in enumerate(zip(table["vendor_key"].to_pylist(), table["month"].to_pylist())):
+                rows_by_partition.setdefault(partition, []).append(row)
+
+            file_columns = table.select(FILE_SCHEMA.names)
+            for (vendor_key, month), rows in rows_by_partition.items():
+                directory = self._partition_dir(vendor_key, month)
+                self._write_file(file_columns.take(rows), directory, seq)
+                self._compact(directory)
+            return line_items
+
+    def _dataset(self) -> ds.Dataset:
+        return ds.dataset(
+            self.root_dir,
+            format="parquet",
+            partitioning=self.partitioning,
+            filesystem=fs.LocalFileSystem(use_mmap=True),
+            # Explicit schema so files written before a column existed read it as null
+            schema=pa.schema(list(FILE_SCHEMA) + list(PARTITION_SCHEMA)),
+        )
+
+    def _build_filter(
+        self,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        vendors: Optional[List[str]],
+    ):
+        expr = None
+
+        def _and(a, b):
+            return b if a is None else a & b
+
+        if vendors:
+            expr = _and(expr, ds.field("vendor_key").isin(vendors))
+        # Month partitions prune whole directories; iso_date then trims the
+        # boundary months using Parquet row-group statistics. Invoices whose
+        # date could not be parsed are only returned by unbounded reads.
+        if start_date:
+            expr = _and(expr, ds.field("month") >= start_date[:7])
+            expr = _and(expr, ds.field("iso_date") >= start_date)
+        if end_date:
+            expr = _and(expr, ds.field("month") <= end_date[:7])
+            expr = _and(expr, ds.field("iso_date") <= end_date)
+        return expr
+
+    def read_table(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        vendors: Optional[List[str]] = None,
+    ) -> pa.Table:
+        """
+        Reads line items for the given ISO date range and vendors as an Arrow table.
+
+        Filters are pushed down to partition pruning and Parquet statistics,
+        and files are memory-mapped rather than read into Python buffers.
+        """
+        with self.lock:
+            if not os.listdir(self.root_dir):
+                return INVOICE_SCHEMA.empty_table()
+            table = self._dataset().to_table(
+                columns=FILE_SCHEMA.names,
+                filter=self._build_filter(start_date, end_date, vendors),
+            )
+        return _latest_writes(table).select(INVOICE_SCHEMA.names)
+
+    def load_invoices(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        vendors: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Loads stored invoices in the same shape the parsers return.
+
+        Args:
+            start_date (str): Inclusive ISO start date (YYYY-MM-DD), or None for no lower bound.
+            end_date (str): Inclusive ISO end date (YYYY-MM-DD), or None for no upper bound.
+            vendors (list): Vendor names to include, or None for all vendors.
+
+        Returns:
+            list: A list of invoice dictionaries, each with a list of products.
+        """
+        table = self.read_table(start_date, end_date, vendors)
+        invoices: Dict[tuple, Dict[str, Any]] = {}
+        for row in table.to_pylist():
+            key = (row["invoice_id"], row["vendor"], row["date"])
+            if key not in invoices:
+                invoices[key] = {
+                    "invoice_id": row["invoice_id"],
+                    "vendor": row["vendor"],
+                    "date": row["date"],
+                    "products": [],
+                }
+                for field in ("gstin", "pan"):
+                    if row[field] is not None:
+                        invoices[key][field] = row[field]
+            if row["line_no"] is None:
+                continue
+            product = {"name": row["name"]}
+            for field in LINE_ITEM_NUMBERS:
+                raw = row[f"{field}_raw"]
+                product[field] = raw if raw is not None else row[field]
+            invoices[key]["products"].append(product)
+        return list(invoices.values())
+
+
+# Example usage:
+if __name__ == "__main__":
+    import pprint
+    from parsers.csv_parser import csv_parser
+
+    store = InvoiceStore("./invoice_store")
+    store.append(csv_parser('./sample_data/test1.csv'), source="test1.csv")
+    pprint.pprint(store.load_invoices("2025-06-01", "2025-06-30", ["ABC Traders"]), indent=2)
@@ -1,5 +1,5 @@
 # main.py
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Request, BackgroundTasks
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Dict, Any, Optional
@@ -8,6 +8,7 @@ import os
 import shutil
 import time
 import random
+from datetime import datetime
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -41,6 +42,32 @@ try:
 except ImportError:
     raise ImportError("pdf_parser not found. Ensure parsers/pdf_parser.py exists.")
 
+# Import audit tiering (templated fast path for low-risk batches)
+try:
+    from Mistral.audit_tiering import AuditTierPolicy, render_template_report, FAST_PATH_TIER
+except ImportError:
+    raise ImportError("AuditTierPolicy not found. Ensure Mistral/audit_tiering.py exists.")
+
+# Import LLM gateway metrics
+try:
+    from Gateway.llm_gateway import gateway_metrics
+except ImportError:
+    raise ImportError("gateway_metrics not found. Ensure Gateway/llm_gateway.py exists.")
+
+# Import audit result delivery (pagination, compression, ETags)
+try:
+    from Delivery.audit_delivery import (
+        AuditResultCache, PAGINATED_SECTIONS, audit_overview, json_delivery_response, paginate, section_items
+    )
+except ImportError:
+    raise ImportError("AuditResultCache not found. Ensure Delivery/audit_delivery.py exists.")
+
+# Import InvoiceStore
+try:
+    from Storage.invoice_store import InvoiceStore
+except ImportError:
+    raise ImportError("InvoiceStore not found. Ensure Storage/invoice_store.py exists.")
+
 # --- FastAPI App Initialization ---
 app = FastAPI(
     title="Financial Audit AI Backend",
@@ -61,12 +88,34 @@ app.add_middleware(
 llama_summarizer = LlamaAuditSummarizer()
 mistral_audit_agent = InvoiceAuditAgent() # Note: InvoiceAuditAgent will use MistralAuditLogic internally
 
+# Risk thresholds that decide when the LLM agents are needed
+audit_tier_policy = AuditTierPolicy.from_env()
+
+# Structured audit outputs kept for paginated retrieval by the frontend
+audit_results = AuditResultCache(int(os.getenv("AUDIT_RESULT_CACHE_SIZE", "100")))
+
 # Directory to temporarily store uploaded files
 UPLOAD_DIR = "uploaded_files"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Columnar store that parsed invoices are appended to for historical audits
+INVOICE_STORE_DIR = os.getenv("INVOICE_STORE_DIR", "invoice_store")
+invoice_store = InvoiceStore(INVOICE_STORE_DIR)
+
+
+def store_invoices(invoices: List[Dict[str, Any]], source: str) -> None:
+    """Best-effort append to the invoice store; a storage failure never fails an audit."""
+    try:
+        written = invoice_store.append(invoices, source=source)
+        print(f"Stored {written} line items from {source}.")
+    except Exception as e:
+        print(f"⚠️ Failed to store invoices from {source}: {e}")
+
+# Sync handler so FastAPI runs it in its threadpool; blocking LLM calls then
+# share the gateway's concurrency pool instead of stalling the event loop.
 @app.post("/audit")
-async def perform_audit(
+def perform_audit(
+    background_tasks: BackgroundTasks,
     message: str = Form(...), # User's chat message
     csv_file: Optional[UploadFile] = File(None), # Optional CSV file upload
     pdf_file: Optional[UploadFile] = File(None)  # Optional PDF file upload
@@ -81,7 +130,8 @@ async def perform_audit(
         pdf_file (Optional[UploadFile]): An optional PDF file containing financial data.
 
     Returns:
-        JSONResponse: A JSON object containing the markdown audit summary.
+        JSONResponse: A JSON object containing the markdown audit summary and, when
+        invoices were audited, an ``audit_id`` for fetching the structured results.
     """
     raw_invoices: List[Dict[str, Any]] = []
     temp_file_paths = []
@@ -97,6 +147,8 @@ async def perform_audit(
             parsed_csv_invoices = csv_parser(csv_path)
             raw_invoices.extend(parsed_csv_invoices)
             print(f"Parsed {len(parsed_csv_invoices)} invoices from CSV.")
+            # Stored after the response is sent
+            background_tasks.add_task(store_invoices, parsed_csv_invoices, csv_file.filename)
 
         # Process PDF file if provided
         if pdf_file:
@@ -108,6 +160,7 @@ async def perform_audit(
             parsed_pdf_invoices = pdf_parser(pdf_path)
             raw_invoices.extend(parsed_pdf_invoices)
             print(f"Parsed {len(parsed_pdf_invoices)} invoices from PDF.")
+            background_tasks.add_task(store_invoices, parsed_pdf_invoices, pdf_file.filename)
 
         if not raw_invoices:
             # If no files were uploaded or parsed, return an error
@@ -117,20 +170,32 @@ async def perform_audit(
 
             # raise HTTPException(status_code=400, detail="No valid invoice data found. Please upload CSV or PDF files.")
 
-        # Step 1: Run through InvoiceAuditAgent (which includes MistralAuditLogic)
-        # This generates the structured audit_json with fuzzy insights
-        print("Running InvoiceAuditAgent to get initial audit data and fuzzy insights...")
-        audit_output = mistral_audit_agent.audit(raw_invoices)
+        # Step 1: Run the rule-based checks (MistralAuditLogic)
+        audit_json = MistralAuditLogic(raw_invoices).run_audit()
+
+        # Step 2: Low-risk batches get a templated report without any LLM calls
+        tier, crossed = audit_tier_policy.select_tier(audit_json)
+        if tier == FAST_PATH_TIER:
+            print("Batch is below all risk thresholds; rendering templated report.")
+            final_summary_markdown = render_template_report(audit_json)
+            audit_id = audit_results.put(audit_json)
+            return JSONResponse(content={"response": final_summary_markdown, "audit_id": audit_id})
+        print(f"Risk thresholds crossed: {', '.join(crossed) or 'tiering disabled'}.")
+
+        # Step 3: Have InvoiceAuditAgent phrase the anomaly engine's fuzzy insights
+        print("Running InvoiceAuditAgent to phrase fuzzy insights...")
+        audit_output = mistral_audit_agent.enrich(audit_json)
         print("InvoiceAuditAgent completed.")
         
-        # Step 2: Summarize with LlamaAuditSummarizer
+        # Step 4: Summarize with LlamaAuditSummarizer
         # The LlamaSummarizer expects the entire audit_json as its input
         print("Summarizing audit data with LlamaAuditSummarizer...")
         final_summary_markdown = llama_summarizer.summarize(audit_output)
         # print(f"Final summary generated:\n{final_summary_markdown}")
         print("LlamaAuditSummarizer completed.")
 
-        return JSONResponse(content={"response": final_summary_markdown})
+        audit_id = audit_results.put(audit_output)
+        return JSONResponse(content={"response": final_summary_markdown, "audit_id": audit_id})
 
     except HTTPException as e:
         # Re-raise HTTPExceptions for proper FastAPI error handling
@@ -145,3 +210,120 @@ async def perform_audit(
             if os.path.exists(path):
                 os.remove(path)
                 print(f"Cleaned up temporary file: {path}")
+
+
+@app.get("/audit/results/{audit_id}")
+async def get_audit_results(
+    audit_id: str,
+    request: Request,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Returns the structured audit for a previous /audit call. The issues,
+    vendor_summary and duplicate_amounts sections hold their first page and a
+    ``next_cursor`` for /audit/results/{audit_id}/{section}.
+
+    Args:
+        audit_id (str): The id returned by /audit.
+        limit (int): Page size for the paginated sections.
+
+    Returns:
+        Response: JSON, compressed per Accept-Encoding, with an ETag (304 if unchanged).
+    """
+    audit_output = audit_results.get(audit_id)
+    if audit_output is None:
+        raise HTTPException(status_code=404, detail="Audit result not found or expired.")
+    return json_delivery_response(request, audit_overview(audit_output, limit))
+
+
+@app.get("/audit/results/{audit_id}/{section}")
+async def get_audit_section(
+    audit_id: str,
+    section: str,
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Returns one page of issues, vendor_summary or duplicate_amounts for a previous audit.
+
+    Args:
+        audit_id (str): The id returned by /audit.
+        section (str): One of issues, vendor_summary, duplicate_amounts.
+        cursor (Optional[str]): ``next_cursor`` from the previous page; omit for the first page.
+        limit (int): Page size.
+
+    Returns:
+        Response: JSON page, compressed per Accept-Encoding, with an ETag (304 if unchanged).
+    """
+    if section not in PAGINATED_SECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown section '{section}'.")
+    audit_output = audit_results.get(audit_id)
+    if audit_output is None:
+        raise HTTPException(status_code=404, detail="Audit result not found or expired.")
+    try:
+        page = paginate(section_items(audit_output, section), section, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_delivery_response(request, page)
+
+
+def _parse_iso_date(value: Optional[str], name: str) -> Optional[str]:
+    """Rejects anything but a real YYYY-MM-DD date; the store compares dates as strings."""
+    if value is None:
+        return None
+    try:
+        if len(value) != 10:
+            raise ValueError
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be a date in YYYY-MM-DD format.")
+    return value
+
+
+# Sync handler so the Parquet reads and the audit run in FastAPI's threadpool
+@app.get("/audit/history")
+def historical_audit(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    vendor: Optional[List[str]] = Query(None)
+):
+    """
+    Runs the rule-based audit over invoices previously stored in the invoice store.
+
+    Args:
+        start_date (Optional[str]): Inclusive start date (YYYY-MM-DD).
+        end_date (Optional[str]): Inclusive end date (YYYY-MM-DD).
+        vendor (Optional[List[str]]): Vendor names to include; repeat the parameter for several vendors.
+
+    Returns:
+        JSONResponse: The structured audit JSON for the selected invoices.
+    """
+    start_date = _parse_iso_date(start_date, "start_date")
+    end_date = _parse_iso_date(end_date, "end_date")
+    mistral_logic = MistralAuditLogic.from_store(invoice_store, start_date, end_date, vendor)
+    if not mistral_logic.invoices:
+        raise HTTPException(status_code=404, detail="No stored invoices match the requested range.")
+    return JSONResponse(content=mistral_logic.run_audit())
+
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    """
+    Reports queue depth, retry and coalescing counters for each shared LLM gateway.
+
+    Returns:
+        JSONResponse: Gateway metrics keyed by model.
+    """
+    return JSONResponse(content=gateway_metrics())
+
+
+@app.get("/metrics/tiers")
+async def tier_metrics():
+    """
+    Reports how often audits took the templated fast path versus the LLM path.
+
+    Returns:
+        JSONResponse: Tier counts, shares and the active thresholds.
+    """
+    return JSONResponse(content=audit_tier_policy.metrics())
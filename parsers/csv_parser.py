@@ -21,6 +21,7 @@ def df_to_invoices(df):
     """
     Converts a DataFrame to a list of invoice dictionaries.
     Assumes the DataFrame has columns: invoice_id, vendor, date, product, quantity, unit_price, total.
+    Optional gstin and pan columns are copied onto the invoice when present.
 
     Args:
         df (pandas.DataFrame): DataFrame containing invoice data.
@@ -38,6 +39,8 @@ def df_to_invoices(df):
     if not all(col in df.columns for col in required_cols):
         return invoices
 
+    tax_id_cols = [col for col in ['gstin', 'pan'] if col in df.columns]
+
     grouped = df.groupby(group_cols)
     for (invoice_id, vendor, date), group in grouped:
         products = []
@@ -55,6 +58,9 @@ def df_to_invoices(df):
             "date": date,
             "products": products
         }
+        for col in tax_id_cols:
+            values = group[col].dropna()
+            invoice[col] = str(values.iloc[0]).strip() if not values.empty else ""
         invoices.append(invoice)
     return invoices
 
@@ -40,6 +40,8 @@ def df_to_invoices(data_dict):
         invoice_id = None
         date = None
         vendor = None
+        gstin = None
+        pan = None
 
         # Extract header fields
         for line in lines:
@@ -49,6 +51,10 @@ def df_to_invoices(data_dict):
                 date = line.split("Date:")[1].strip()
             elif line.startswith("Vendor:"):
                 vendor = line.split("Vendor:")[1].strip()
+            elif line.startswith("GSTIN:"):
+                gstin = line.split("GSTIN:")[1].strip()
+            elif line.startswith("PAN:"):
+                pan = line.split("PAN:")[1].strip()
 
         # Find the start of the items table
         try:
@@ -80,6 +86,11 @@ def df_to_invoices(data_dict):
                     "date": date,
                     "products": products
                 }
+                # Only attach tax ids the document actually carries
+                if gstin is not None:
+                    invoice["gstin"] = gstin
+                if pan is not None:
+                    invoice["pan"] = pan
                 invoices.append(invoice)
         except ValueError:
             pass  # No product table found
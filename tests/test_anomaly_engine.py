@@ -0,0 +1,131 @@
+import numpy as np
+
+from Mistral.anomaly_engine import MAX_INSIGHTS_PER_TYPE, AnomalyEngine, merge_phrased_insights, robust_z_scores
+
+
+def _record(invoice_id, vendor, item="Widget", quantity=10.0, amount=1000.0):
+    return {"invoice_id": invoice_id, "vendor": vendor, "item": item, "quantity": quantity, "amount": amount}
+
+
+def _types(insights):
+    return [insight["type"] for insight in insights]
+
+
+def test_robust_z_scores_flags_outlier():
+    scores = robust_z_scores(np.array([10.0, 11.0, 9.0, 10.0, 1000.0]))
+    assert abs(scores[-1]) > 3.5
+    assert np.all(np.abs(scores[:-1]) < 3.5)
+
+
+def test_suspicious_quantity_reports_group_median():
+    records = [_record(f"INV-{i}", "A", quantity=q) for i, q in enumerate([10, 12, 9, 11, 10, 1000])]
+    insights = AnomalyEngine(records).suspicious_quantities()
+    assert _types(insights) == ["suspicious_quantity"]
+    assert "INV-5" in insights[0]["description"]
+    assert "typical 10.5" in insights[0]["description"]
+
+
+def test_vendors_sharing_an_invoice_id_are_kept_apart():
+    records = [
+        _record("INV-1", "A"), _record("INV-2", "A"), _record("INV-3", "A"),
+        _record("INV-1", "B"),
+    ]
+    insights = AnomalyEngine(records).single_invoice_vendors()
+    assert [i["description"] for i in insights] == [
+        "Vendor 'B' has only one invoice in this batch, which may warrant further review."
+    ]
+
+
+def test_zero_value_and_repeated_non_round_amounts():
+    records = [
+        _record("INV-1", "A", amount=1499.5),
+        _record("INV-2", "A", amount=1499.5),
+        _record("INV-3", "A", amount=500.0),
+        _record("INV-4", "A", amount=500.0),
+        _record("INV-5", "A", quantity=0.0, amount=0.0),
+    ]
+    engine = AnomalyEngine(records)
+    assert _types(engine.zero_value_items()) == ["zero_value_item"]
+    repeated = engine.repeated_non_round_amounts()
+    assert _types(repeated) == ["repeated_non_round_amount"]
+    assert "₹1,499.50" in repeated[0]["description"]
+    assert "INV-1, INV-2" in repeated[0]["description"]
+
+
+def test_benford_deviation_needs_skewed_digits():
+    skewed = [_record(f"INV-{i}", "A", amount=8000.0 + i) for i in range(60)]
+    assert _types(AnomalyEngine(skewed).benford_deviation()) == ["benford_deviation"]
+
+    rng = np.random.default_rng(0)
+    benford_like = [_record(f"INV-{i}", "A", amount=float(10 ** rng.uniform(1, 6))) for i in range(2000)]
+    assert AnomalyEngine(benford_like).benford_deviation() == []
+
+
+def test_findings_are_capped_per_type():
+    records = [_record(f"INV-{i}", f"V{i}", quantity=0.0, amount=0.0) for i in range(MAX_INSIGHTS_PER_TYPE + 5)]
+    insights = AnomalyEngine(records).zero_value_items()
+    assert len(insights) == MAX_INSIGHTS_PER_TYPE + 1
+    assert insights[-1]["description"] == "5 more zero value item finding(s) omitted."
+
+
+def test_empty_batch():
+    assert AnomalyEngine([]).detect() == []
+
+
+ENGINE_INSIGHTS = [
+    {"type": "suspicious_quantity", "description": "Invoice INV-5 bills 1000 × 'Widget'."},
+    {"type": "zero_value_item", "description": "Line item 'Pens' on invoice INV-7 has a quantity and billed amount of zero."},
+]
+
+
+def test_merge_uses_model_wording_when_findings_line_up():
+    phrased = [
+        {"type": "suspicious_quantity", "description": "INV-5 orders 1000 widgets, far above normal."},
+        {"type": "zero_value_item", "description": "INV-7 lists 'Pens' at zero quantity and value."},
+        {"type": "unusual_item_mix", "description": "INV-9 mixes stationery with cement."},
+    ]
+    merged, aligned = merge_phrased_insights(ENGINE_INSIGHTS, phrased)
+    assert aligned
+    assert [i["description"] for i in merged] == [i["description"] for i in phrased]
+
+
+def test_merge_keeps_engine_findings_when_model_drops_or_invents():
+    invented = [{"type": "suspicious_quantity", "description": "Made-up finding."}]
+    merged, aligned = merge_phrased_insights(ENGINE_INSIGHTS, invented)
+    assert not aligned
+    assert merged == ENGINE_INSIGHTS
+
+    reordered = list(reversed(ENGINE_INSIGHTS))
+    assert merge_phrased_insights(ENGINE_INSIGHTS, reordered) == (ENGINE_INSIGHTS, False)
+
+
+def test_merge_appends_only_item_mix_when_not_aligned():
+    phrased = [
+        {"type": "benford_deviation", "description": "Invented."},
+        {"type": "unusual_item_mix", "description": "INV-9 mixes stationery with cement."},
+        {"type": "unusual_item_mix", "description": ""},
+        "not an insight",
+    ]
+    merged, aligned = merge_phrased_insights(ENGINE_INSIGHTS, phrased)
+    assert not aligned
+    assert merged == ENGINE_INSIGHTS + [{"type": "unusual_item_mix", "description": "INV-9 mixes stationery with cement."}]
+
+
+def test_merge_rejects_rewording_that_changes_facts():
+    phrased = [
+        {"type": "suspicious_quantity", "description": "INV-6 orders 1000 widgets, far above normal."},
+        {"type": "zero_value_item", "description": "INV-7 lists 'Pens' at zero quantity and value."},
+    ]
+    merged, aligned = merge_phrased_insights(ENGINE_INSIGHTS, phrased)
+    assert not aligned
+    assert merged == [ENGINE_INSIGHTS[0], phrased[1]]
+
+    engine = [{"type": "unusual_invoice_amount", "description": "Invoice INV-2 totals ₹1,234.56 (robust z-score 8.1)."}]
+    changed_amount = [{"type": "unusual_invoice_amount", "description": "INV-2 totals Rs. 1234.50, z-score 8.1."}]
+    kept_amount = [{"type": "unusual_invoice_amount", "description": "INV-2 came to Rs. 1234.56, a z-score of 8.1."}]
+    assert merge_phrased_insights(engine, changed_amount) == (engine, False)
+    assert merge_phrased_insights(engine, kept_amount) == (kept_amount, True)
+
+
+def test_merge_ignores_malformed_model_output():
+    assert merge_phrased_insights(ENGINE_INSIGHTS, None) == (ENGINE_INSIGHTS, False)
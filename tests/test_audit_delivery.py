@@ -0,0 +1,78 @@
+import gzip
+import json
+
+import pytest
+from starlette.requests import Request
+
+from Delivery import audit_delivery
+from Delivery.audit_delivery import (
+    _accepted_quality, _choose_encoding, decode_cursor, encode_cursor, json_delivery_response, paginate
+)
+
+
+def _request(**headers):
+    raw = [(k.replace("_", "-").encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", 1.0),
+    ("gzip;q=0.5", 0.5),
+    ("gzip; q=0", 0.0),
+    ("gzip;q=0.00", 0.0),
+    ("gzip;q=0.000, br", 0.0),
+    ("GZIP;Q=0.8", 0.8),
+    ("gzip;q=abc", 0.0),
+    ("*", 1.0),
+    ("*;q=0", 0.0),
+    ("gzip;q=0, *", 0.0),
+    ("*;q=0, gzip;q=1", 1.0),
+    ("br", 0.0),
+    ("", 0.0),
+])
+def test_accepted_quality_parses_q_values(header, expected):
+    assert _accepted_quality(_request(accept_encoding=header), "gzip") == expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("br;q=0.1, gzip;q=1", "gzip"),
+    ("gzip;q=0.5, br", "br"),
+    ("gzip, br", "br"),
+    ("*", "br"),
+    ("br;q=0, *;q=0.3", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("identity", None),
+])
+def test_choose_encoding_prefers_highest_q(header, expected):
+    pytest.importorskip("brotli")
+    assert _choose_encoding(_request(accept_encoding=header)) == expected
+
+
+def test_choose_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(audit_delivery, "brotli", None)
+    assert _choose_encoding(_request(accept_encoding="br, gzip;q=0.1")) == "gzip"
+    assert _choose_encoding(_request(accept_encoding="br")) is None
+
+
+def test_gzip_response_and_etag_revalidation():
+    payload = {"items": ["x" * 50] * 20}
+    response = json_delivery_response(_request(accept_encoding="gzip;q=1.0"), payload)
+    assert response.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.body)) == payload
+
+    etag = response.headers["etag"]
+    assert json_delivery_response(_request(if_none_match=etag), payload).status_code == 304
+
+
+def test_paginate_walks_every_item():
+    items = list(range(7))
+    seen, cursor = [], None
+    while True:
+        page = paginate(items, "issues", cursor, 3)
+        seen += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == items
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor("issues", 3), "vendor_summary")
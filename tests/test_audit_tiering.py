@@ -0,0 +1,105 @@
+from Mistral.audit_tiering import FAST_PATH_TIER, LLM_TIER, AuditTierPolicy, render_template_report
+
+
+def _clean_audit(**overrides):
+    audit = {
+        "summary": {"total_invoices": 2, "vendors": 2, "date_range": {"start": "2025-06-01", "end": "2025-06-02"}},
+        "issues": [],
+        "compliance_flags": {"missing_fields": [], "future_dates": [], "invalid_gstin": [], "invalid_pan": []},
+        "vendor_summary": [
+            {"vendor": "A", "invoice_count": 1, "total_billed": 5000.0},
+            {"vendor": "B", "invoice_count": 1, "total_billed": 6000.0},
+        ],
+        "invoice_patterns": {"duplicate_amounts": [], "repeated_items": []},
+        "fuzzy_insights": [
+            {"type": "single_invoice_vendor", "description": "Vendor 'A' has only one invoice in this batch."},
+        ],
+    }
+    audit.update(overrides)
+    return audit
+
+
+def _risky_audit():
+    return _clean_audit(
+        issues=[{
+            "invoice_id": "INV-1", "vendor": "A", "issue_type": "total_mismatch",
+            "description": "Total mismatch for item Cement: expected 5000.00, got 4500.00", "severity": "high",
+        }],
+        compliance_flags={
+            "missing_fields": [{"invoice_id": "INV-2", "field": "pan"}],
+            "future_dates": [],
+            "invalid_gstin": [{"invoice_id": "INV-1", "gstin": "27AAPFU0939F1ZX", "reason": "checksum_mismatch"}],
+            "invalid_pan": [{"invoice_id": "INV-2", "pan": "AAPF00939F", "reason": "invalid_format"}],
+        },
+        invoice_patterns={
+            "duplicate_amounts": [
+                {"amount": 5000.0, "invoice_ids": ["INV-1", "INV-2"]},
+                {"amount": None, "invoice_ids": ["INV-3", "INV-4"]},
+            ],
+            "repeated_items": [{"item": "Cement", "occurrences": 2}],
+        },
+    )
+
+
+def test_clean_batch_takes_fast_path():
+    policy = AuditTierPolicy()
+    assert policy.select_tier(_clean_audit()) == (FAST_PATH_TIER, [])
+    assert policy.metrics()["tiers"][FAST_PATH_TIER]["count"] == 1
+
+
+def test_clean_report_has_all_sections():
+    report = render_template_report(_clean_audit())
+    for section in ("## Legal Summary", "## Manager Summary", "## Accountant Summary"):
+        assert section in report
+    assert "2 vendor(s) appear on a single invoice: B, A." in report
+    assert "No compliance action required" in report
+    assert "No managerial action required" in report
+    assert "Records are ready for reconciliation as submitted." in report
+
+
+def test_raised_thresholds_render_findings_on_fast_path():
+    policy = AuditTierPolicy(
+        max_issues=1, max_missing_fields=1, max_invalid_gstin=1, max_invalid_pan=1, max_duplicate_amounts=2,
+    )
+    assert policy.select_tier(_risky_audit()) == (FAST_PATH_TIER, [])
+
+    report = render_template_report(_risky_audit())
+    assert "1 missing field(s), 1 invalid GSTIN(s), 1 invalid PAN(s)" in report
+    assert "- **Missing Field:** `pan` on INV-2." in report
+    assert "- **Invalid GSTIN:** 27AAPFU0939F1ZX on INV-1 (checksum_mismatch)." in report
+    assert "- **Invalid PAN:** AAPF00939F on INV-2 (invalid_format)." in report
+    assert "Request corrected invoices" in report
+    assert "Cement (2x)" in report
+    assert "INV-1: Total mismatch for item Cement: expected 5000.00, got 4500.00." in report
+    assert "Amount ₹5,000.00 appears on INV-1, INV-2." in report
+    assert "Amount ₹0.00 appears on INV-3, INV-4." in report
+    assert "Reconcile the line items listed above" in report
+
+
+def test_default_thresholds_send_risky_batch_to_llm():
+    tier, crossed = AuditTierPolicy().select_tier(_risky_audit())
+    assert tier == LLM_TIER
+    assert set(crossed) == {"issues", "missing_fields", "invalid_gstin", "invalid_pan", "duplicate_amounts"}
+
+
+def test_tiering_can_be_turned_off(monkeypatch):
+    monkeypatch.setenv("AUDIT_TIERING", "off")
+    policy = AuditTierPolicy.from_env()
+    assert not policy.enabled
+    assert policy.select_tier(_clean_audit()) == (LLM_TIER, [])
+    assert policy.metrics()["tiers"][LLM_TIER]["count"] == 1
+
+
+def test_anomalies_route_to_llm():
+    audit = _clean_audit(fuzzy_insights=[
+        {"type": "suspicious_quantity", "description": "Invoice INV-1 bills 1000 × 'Widget' (robust z-score 600.0)."},
+        {"type": "benford_deviation", "description": "Leading digits deviate from Benford's law."},
+    ])
+    policy = AuditTierPolicy()
+    assert policy.select_tier(audit) == (LLM_TIER, ["anomalies"])
+    assert AuditTierPolicy(max_anomalies=2).select_tier(audit) == (FAST_PATH_TIER, [])
+
+
+def test_anomaly_threshold_from_env(monkeypatch):
+    monkeypatch.setenv("AUDIT_FAST_PATH_MAX_ANOMALIES", "3")
+    assert AuditTierPolicy.from_env().thresholds["anomalies"] == 3
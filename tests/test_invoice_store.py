@@ -0,0 +1,111 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from parsers.csv_parser import csv_parser
+from Storage.invoice_store import COMPACT_AFTER_FILES, InvoiceStore
+from Mistral.audit_logic import MistralAuditLogic
+
+
+SAMPLE_CSV = "sample_data/test1.csv"
+
+
+def _line_items(invoices):
+    return sum(len(inv["products"]) for inv in invoices)
+
+
+def test_appending_same_batch_twice_is_idempotent(tmp_path):
+    store = InvoiceStore(str(tmp_path))
+    invoices = csv_parser(SAMPLE_CSV)
+
+    store.append(invoices, source="first.csv")
+    store.append(invoices, source="second.csv")
+
+    stored = store.load_invoices()
+    assert len(stored) == len(invoices)
+    assert _line_items(stored) == _line_items(invoices)
+
+    direct = MistralAuditLogic(invoices).run_audit()
+    from_store = MistralAuditLogic.from_store(store).run_audit()
+    assert sorted(v["total_billed"] for v in from_store["vendor_summary"]) == \
+        sorted(v["total_billed"] for v in direct["vendor_summary"])
+    assert len(from_store["invoice_patterns"]["duplicate_amounts"]) == \
+        len(direct["invoice_patterns"]["duplicate_amounts"])
+
+
+def test_audit_is_the_same_directly_and_through_the_store(tmp_path):
+    store = InvoiceStore(str(tmp_path))
+    invoices = csv_parser(SAMPLE_CSV) + [
+        {
+            "invoice_id": "INV-2001", "vendor": "Edge Cases Ltd", "date": "2025-07-01", "gstin": "",
+            "products": [
+                {"name": "Free Sample", "quantity": 0, "unit_price": 10.0, "total": 0.0},
+                {"name": "Precise Part", "quantity": 1, "unit_price": 1234.557, "total": 1234.557},
+                {"name": "Huge Order", "quantity": 1, "unit_price": 1e16, "total": 1e16},
+                {"name": "Blank", "quantity": float("nan"), "unit_price": 5.0, "total": 5.0},
+            ],
+        },
+        {
+            "invoice_id": "INV-2002", "vendor": "PDF Supplies", "date": "2025-07-02",
+            "products": [{"name": "Sand Bags", "quantity": "50", "unit_price": "Rs. 80.00", "total": "Rs. 4,000.00"}],
+        },
+        {"invoice_id": "INV-2003", "vendor": "PDF Supplies", "date": "2025-07-03", "products": []},
+    ]
+    store.append(invoices)
+    assert len(store.load_invoices()) == len(invoices)
+
+    direct = MistralAuditLogic(invoices).run_audit()
+    from_store = MistralAuditLogic.from_store(store).run_audit()
+    assert from_store == direct
+
+
+def test_reupload_with_changed_lines_replaces_invoice(tmp_path):
+    store = InvoiceStore(str(tmp_path))
+    invoice = {
+        "invoice_id": "INV-1", "vendor": "ABC Traders", "date": "2025-06-01",
+        "products": [{"name": "Cement", "quantity": "10", "unit_price": "500", "total": "5000"}],
+    }
+    store.append([invoice])
+    invoice["products"][0]["total"] = "4500"
+    store.append([invoice])
+
+    stored = store.load_invoices()
+    assert len(stored) == 1
+    assert stored[0]["products"] == [{"name": "Cement", "quantity": "10", "unit_price": "500", "total": "4500"}]
+
+
+def test_repeated_appends_are_compacted(tmp_path):
+    store = InvoiceStore(str(tmp_path))
+    invoice = {
+        "invoice_id": "INV-1", "vendor": "ABC Traders", "date": "2025-06-01",
+        "products": [{"name": "Cement", "quantity": "10", "unit_price": "500", "total": "5000"}],
+    }
+    for _ in range(COMPACT_AFTER_FILES + 5):
+        store.append([invoice])
+
+    partition = tmp_path / "vendor_key=ABC%20Traders" / "month=2025-06"
+    assert len(list(partition.glob("*.parquet"))) <= COMPACT_AFTER_FILES
+    assert store.read_table().num_rows == 1
+
+
+def test_load_filters_by_date_and_vendor(tmp_path):
+    store = InvoiceStore(str(tmp_path))
+    store.append(csv_parser(SAMPLE_CSV))
+
+    june = store.load_invoices("2025-06-01", "2025-06-30")
+    assert june and all("2025-06-01" <= inv["date"] <= "2025-06-30" for inv in june)
+
+    abc = store.load_invoices(vendors=["ABC Traders"])
+    assert abc and all(inv["vendor"] == "ABC Traders" for inv in abc)
+
+
+def test_non_iso_invoice_dates_are_found_by_range(tmp_path):
+    store = InvoiceStore(str(tmp_path))
+    store.append([
+        {"invoice_id": "INV-1", "vendor": "ABC Traders", "date": "15/06/2025", "products": []},
+        {"invoice_id": "INV-2", "vendor": "ABC Traders", "date": "sometime", "products": []},
+    ])
+
+    june = store.load_invoices("2025-06-01", "2025-06-30")
+    assert [inv["date"] for inv in june] == ["15/06/2025"]
+    assert len(store.load_invoices()) == 2
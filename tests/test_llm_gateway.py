@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+from Gateway.llm_gateway import LLMGateway, TokenBucket
+
+
+class StubResponse:
+    def __init__(self, content):
+        self.content = content
+
+
+class StubError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {
+            "status_code": status_code,
+            "headers": {"retry-after": retry_after} if retry_after is not None else {},
+        })()
+
+
+class StubModel:
+    """Stands in for ChatGroq: raises the queued errors in order, then answers."""
+
+    def __init__(self, errors=(), delay=0.0):
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def invoke(self, messages):
+        with self.lock:
+            self.calls += 1
+            error = self.errors.pop(0) if self.errors else None
+        time.sleep(self.delay)
+        if error is not None:
+            raise error
+        return StubResponse(f"echo: {messages[-1]}")
+
+
+def _gateway(model, **kwargs):
+    options = dict(requests_per_minute=6000, tokens_per_minute=10 ** 6, base_delay=0.01, max_delay=0.5)
+    options.update(kwargs)
+    return LLMGateway(model, **options)
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(rate_per_minute=600, capacity=1)  # 10 tokens per second
+    assert bucket.acquire(1) == 0.0
+    start = time.monotonic()
+    waited = bucket.acquire(1)
+    assert waited > 0
+    assert time.monotonic() - start >= 0.08
+
+
+def test_requests_per_minute_limit_delays_calls():
+    gateway = _gateway(StubModel(), requests_per_minute=600)
+    gateway.request_bucket = TokenBucket(rate_per_minute=600, capacity=1)
+    gateway.invoke(["a"])
+    gateway.invoke(["b"])
+    assert gateway.metrics()["rate_limit_wait_seconds"] > 0
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retries_rate_limits_and_server_errors(status):
+    model = StubModel(errors=[StubError(status), StubError(status)])
+    gateway = _gateway(model)
+    assert gateway.invoke(["hi"]).content == "echo: hi"
+    assert model.calls == 3
+    assert gateway.metrics()["retries"] == 2
+
+
+def test_retries_connection_errors():
+    model = StubModel(errors=[ConnectionError("reset")])
+    assert _gateway(model).invoke(["hi"]).content == "echo: hi"
+    assert model.calls == 2
+
+
+@pytest.mark.parametrize("error", [StubError(401), StubError(400), ValueError("bad prompt"), TypeError("bug")])
+def test_does_not_retry_caller_errors(error):
+    model = StubModel(errors=[error])
+    gateway = _gateway(model)
+    with pytest.raises(type(error)):
+        gateway.invoke(["hi"])
+    assert model.calls == 1
+    assert gateway.metrics()["failures"] == 1
+
+
+def test_gives_up_after_max_retries():
+    model = StubModel(errors=[StubError(503)] * 5)
+    with pytest.raises(StubError):
+        _gateway(model, max_retries=2).invoke(["hi"])
+    assert model.calls == 3
+
+
+def test_retry_after_beyond_max_delay_fails_fast():
+    model = StubModel(errors=[StubError(429, retry_after="86400")])
+    start = time.monotonic()
+    with pytest.raises(StubError):
+        _gateway(model, max_delay=1.0).invoke(["hi"])
+    assert model.calls == 1
+    assert time.monotonic() - start < 1.0
+
+
+def test_coalesces_concurrent_identical_prompts():
+    model = StubModel(delay=0.2)
+    gateway = _gateway(model)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gateway.invoke(["same"]).content)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["echo: same"] * 5
+    assert model.calls == 1
+    assert gateway.metrics()["coalesced"] == 4
+    assert gateway.metrics()["in_flight_prompts"] == 0
+
+
+def test_distinct_prompts_are_not_coalesced():
+    model = StubModel()
+    gateway = _gateway(model)
+    gateway.invoke(["one"])
+    gateway.invoke(["two"])
+    assert model.calls == 2
+    assert gateway.metrics()["coalesced"] == 0
@@ -0,0 +1,86 @@
+import pytest
+
+pytest.importorskip("langchain_groq")
+pytest.importorskip("python_multipart")
+
+from fastapi.testclient import TestClient
+
+from Delivery.audit_delivery import encode_cursor
+
+
+AUDIT_OUTPUT = {
+    "summary": {"total_invoices": 7, "vendors": 2, "date_range": {"start": "2025-06-01", "end": "2025-06-07"}},
+    "issues": [
+        {"invoice_id": f"INV-{i}", "vendor": "A", "issue_type": "total_mismatch", "description": "Mismatch", "severity": "high"}
+        for i in range(7)
+    ],
+    "compliance_flags": {"missing_fields": [], "future_dates": [], "invalid_gstin": [], "invalid_pan": []},
+    "vendor_summary": [{"vendor": "A", "invoice_count": 6, "total_billed": 600.0}],
+    "invoice_patterns": {"duplicate_amounts": [], "repeated_items": []},
+    "fuzzy_insights": [],
+}
+
+
+@pytest.fixture(scope="module")
+def app_module(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("GROQ_API_KEY", "test-key")
+        mp.setenv("INVOICE_STORE_DIR", str(tmp_path_factory.mktemp("invoice_store")))
+        import main
+        yield main
+
+
+@pytest.fixture
+def client(app_module):
+    return TestClient(app_module.app)
+
+
+@pytest.fixture
+def audit_id(app_module):
+    return app_module.audit_results.put(AUDIT_OUTPUT)
+
+
+def test_unknown_audit_or_section_is_404(client, audit_id):
+    assert client.get("/audit/results/missing").status_code == 404
+    assert client.get("/audit/results/missing/issues").status_code == 404
+    assert client.get(f"/audit/results/{audit_id}/fuzzy_insights").status_code == 404
+
+
+def test_cursor_from_another_section_is_400(client, audit_id):
+    cursor = encode_cursor("vendor_summary", 2)
+    response = client.get(f"/audit/results/{audit_id}/issues", params={"cursor": cursor})
+    assert response.status_code == 400
+
+    assert client.get(f"/audit/results/{audit_id}/issues", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_overview_holds_first_page(client, audit_id):
+    overview = client.get(f"/audit/results/{audit_id}", params={"limit": 3}).json()
+    assert overview["summary"] == AUDIT_OUTPUT["summary"]
+    assert overview["issues"]["items"] == AUDIT_OUTPUT["issues"][:3]
+    assert overview["issues"]["total"] == 7
+    assert overview["vendor_summary"]["next_cursor"] is None
+
+
+def test_walking_pages_returns_every_item_once(client, audit_id):
+    items, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(f"/audit/results/{audit_id}/issues", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        items += page["items"]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert items == AUDIT_OUTPUT["issues"]
+    assert pages == 3
+
+
+def test_page_etag_revalidates(client, audit_id):
+    first = client.get(f"/audit/results/{audit_id}/issues")
+    again = client.get(f"/audit/results/{audit_id}/issues", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
@@ -0,0 +1,69 @@
+import pytest
+
+from Mistral.audit_logic import MistralAuditLogic
+from Mistral.tax_id_validator import REASONS, find_invalid_gstins, validate_gstins, validate_pans
+
+
+def _reasons(validator, ids):
+    return [REASONS[code] for code in validator(ids)]
+
+
+@pytest.mark.parametrize("gstin", ["27AAPFU0939F1ZV", "29AAGCB7383J1Z4", "27aapfu0939f1zv"])
+def test_valid_gstins(gstin):
+    assert _reasons(validate_gstins, [gstin]) == [None]
+
+
+@pytest.mark.parametrize("gstin, reason", [
+    ("27AAPFU0939F1ZX", "checksum_mismatch"),
+    ("99AAPFU0939F1ZV", "checksum_mismatch"),
+    ("123INVALIDGST", "invalid_length"),
+    ("27AAPFU0939F1ZV0", "invalid_length"),
+    ("27AAPF00939F1ZV", "invalid_format"),
+    ("27AAPFU0939F0ZV", "invalid_format"),
+    ("27AAPFU0939F1YV", "invalid_format"),
+    ("27AAPFU0939F1ZÄ", "invalid_format"),
+    ("45AAPFU0939F1ZV", "invalid_state_code"),
+    ("27AAPXU0939F1ZV", "invalid_pan_entity_type"),
+    ("", "missing"),
+    (None, "missing"),
+])
+def test_invalid_gstins(gstin, reason):
+    assert _reasons(validate_gstins, [gstin]) == [reason]
+
+
+def test_bulk_validation_keeps_order():
+    ids = ["27AAPFU0939F1ZV", "123INVALIDGST", None, "29AAGCB7383J1Z4"]
+    assert _reasons(validate_gstins, ids) == [None, "invalid_length", "missing", None]
+    assert len(validate_gstins([])) == 0
+
+
+def test_long_garbage_value_does_not_widen_the_batch():
+    ids = ["GSTIN: " + "X" * 5000] + ["27AAPFU0939F1ZV"] * 20000
+    reasons = validate_gstins(ids)
+    assert REASONS[reasons[0]] == "invalid_length"
+    assert not reasons[1:].any()
+
+
+@pytest.mark.parametrize("pan, reason", [
+    ("AAPFU0939F", None),
+    ("aapfu0939f", None),
+    ("AAPXU0939F", "invalid_pan_entity_type"),
+    ("AAPF00939F", "invalid_format"),
+    ("AAPFU0939", "invalid_length"),
+    ("", "missing"),
+])
+def test_pans(pan, reason):
+    assert _reasons(validate_pans, [pan]) == [reason]
+
+
+def test_audit_flags_invalid_and_missing_gstin():
+    invoices = [
+        {"invoice_id": "INV-1", "vendor": "A", "date": "2025-06-01", "gstin": "27AAPFU0939F1ZV", "products": []},
+        {"invoice_id": "INV-2", "vendor": "B", "date": "2025-06-02", "gstin": "123INVALIDGST", "products": []},
+        {"invoice_id": "INV-3", "vendor": "C", "date": "2025-06-03", "gstin": "", "products": []},
+        {"invoice_id": "INV-4", "vendor": "D", "date": "2025-06-04", "products": []},
+    ]
+    assert find_invalid_gstins(invoices) == [
+        {"invoice_id": "INV-2", "gstin": "123INVALIDGST", "reason": "invalid_length"},
+    ]
+    assert MistralAuditLogic(invoices).detect_missing_fields() == [{"invoice_id": "INV-3", "field": "gstin"}]